@@ -83,5 +83,41 @@ def generate_sample_datasets():
     
     print("\n✅ All sample datasets generated successfully!")
 
+def generate_high_frequency_readings(num_gauges=1000, days=365, chunk_days=7, freq='15min',
+                                     start='2024-01-01', seed=42):
+    """Yield (rainfall, river_level) chunks of sub-daily telemetry as (time x gauge) frames"""
+    rng = np.random.default_rng(seed)
+    gauges = [f"gauge_{i:04d}" for i in range(num_gauges)]
+    index = pd.date_range(start, periods=int(pd.Timedelta(days=days) / pd.Timedelta(freq)), freq=freq)
+    steps_per_hour = pd.Timedelta('1h') / pd.Timedelta(freq)
+    steps_per_chunk = int(pd.Timedelta(days=chunk_days) / pd.Timedelta(freq))
+    
+    # River level relaxes towards its base and jumps with runoff
+    decay = 0.5 ** (1 / (24 * steps_per_hour))
+    level = np.full(num_gauges, 2.0, dtype=np.float32)
+    storm_hours = np.zeros(num_gauges)
+    
+    for offset in range(0, len(index), steps_per_chunk):
+        chunk_index = index[offset:offset + steps_per_chunk]
+        n = len(chunk_index)
+        is_monsoon = ((chunk_index.month >= 6) & (chunk_index.month <= 9))[:, None]
+        
+        # Storms start at random and last a few hours; intensity is mm per step
+        storm_start = rng.random((n, num_gauges)) < np.where(is_monsoon, 0.004, 0.0008)
+        rainfall = np.zeros((n, num_gauges), dtype=np.float32)
+        for t in range(n):
+            storm_hours = np.where(storm_start[t], rng.exponential(4, num_gauges), storm_hours - 1 / steps_per_hour)
+            wet = storm_hours > 0
+            rainfall[t, wet] = rng.gamma(1.5, 2.0, wet.sum())
+        
+        river_level = np.empty((n, num_gauges), dtype=np.float32)
+        for t in range(n):
+            level = 2.0 + (level - 2.0) * decay + 0.01 * rainfall[t]
+            river_level[t] = level
+        river_level += rng.normal(0, 0.02, river_level.shape).astype(np.float32)
+        
+        yield (pd.DataFrame(rainfall, index=chunk_index, columns=gauges),
+               pd.DataFrame(river_level, index=chunk_index, columns=gauges))
+
 if __name__ == "__main__":
     generate_sample_datasets()
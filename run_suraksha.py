@@ -42,8 +42,7 @@ def train_ml_models():
         
         # Prepare features
         feature_cols = ['rainfall', 'river_level', 'rainfall_3day', 'rainfall_7day', 'river_rise']
-        X = data[feature_cols].fillna(0)
-        y = data['flood_occurred']
+        X, y = processor.training_matrix(data, feature_cols)
         
         # Train models
         trainer = FloodModelTrainer()
@@ -4,6 +4,14 @@ const path = require('path');
 const { spawn } = require('child_process');
 const fs = require('fs');
 
+// Optional: indexed alert store written by src/alert_store.py
+let Database = null;
+try {
+  Database = require('better-sqlite3');
+} catch (err) {
+  Database = null;
+}
+
 const app = express();
 const PORT = process.env.PORT || 5000;
 
@@ -26,6 +34,7 @@ app.get('/', (req, res) => {
     endpoints: {
       modelStats: '/api/model-stats',
       alerts: '/api/alerts',
+      alertRuns: '/api/alerts/runs',
       cities: '/api/cities',
       simulation: '/api/simulation',
       generateSimulation: '/api/generate-simulation (POST)'
@@ -55,12 +64,80 @@ app.get('/api/simulation', (req, res) => {
 });
 
 // Get alert data
+const SEVERITY_LEVELS = { LOW: 0, MODERATE: 1, HIGH: 2, SEVERE: 3 };
+const alertDbPath = path.join(__dirname, '../visualization/alerts.db');
+let alertDb = null;
+
+function getAlertDb() {
+  if (!alertDb && Database && fs.existsSync(alertDbPath)) {
+    alertDb = new Database(alertDbPath, { readonly: true, fileMustExist: true });
+  }
+  return alertDb;
+}
+
+function parseAlertRow(row) {
+  const { details, ...alert } = row;
+  return details ? { ...alert, ...JSON.parse(details) } : alert;
+}
+
+function latestRunId(db) {
+  const row = db.prepare('SELECT run_id FROM runs ORDER BY id DESC LIMIT 1').get();
+  return row ? row.run_id : null;
+}
+
+// Runs stored in the alert database, newest first
+app.get('/api/alerts/runs', (req, res) => {
+  const db = getAlertDb();
+  if (!db) {
+    return res.json({ success: true, data: [] });
+  }
+  const limit = Math.min(parseInt(req.query.limit, 10) || 20, 500);
+  const rows = db.prepare('SELECT run_id, created, source FROM runs ORDER BY id DESC LIMIT ?').all(limit);
+  res.json({ success: true, data: rows });
+});
+
+// Query params: run (default: latest run), city, from, to (timestep within the run),
+// minLevel (LOW|MODERATE|HIGH|SEVERE), latest=true (newest alert per city, any run), limit
 app.get('/api/alerts', (req, res) => {
+  const { city, from, to, minLevel, latest } = req.query;
+  const limit = Math.min(parseInt(req.query.limit, 10) || 500, 5000);
+  const db = getAlertDb();
+
+  if (db) {
+    if (latest === 'true') {
+      const rows = db.prepare(
+        'SELECT alerts.* FROM latest_alerts JOIN alerts ON alerts.id = latest_alerts.alert_id ORDER BY latest_alerts.city'
+      ).all();
+      return res.json({ success: true, data: rows.map(parseAlertRow) });
+    }
+
+    // Timesteps restart at 0 in every run, so queries are always scoped to one run
+    const runId = req.query.run || latestRunId(db);
+    const where = ['run_id = ?'];
+    const params = [runId];
+    if (city) { where.push('city = ?'); params.push(city); }
+    if (from !== undefined) { where.push('timestep >= ?'); params.push(parseInt(from, 10)); }
+    if (to !== undefined) { where.push('timestep <= ?'); params.push(parseInt(to, 10)); }
+    let order = 'timestep DESC, id DESC';
+    if (minLevel && SEVERITY_LEVELS[minLevel] !== undefined) {
+      where.push('severity >= ?');
+      params.push(SEVERITY_LEVELS[minLevel]);
+      // Matches idx_alerts_run_severity, so no sort step
+      order = 'severity DESC, id DESC';
+    }
+
+    const sql = `SELECT * FROM alerts WHERE ${where.join(' AND ')} ORDER BY ${order} LIMIT ?`;
+    const rows = db.prepare(sql).all(...params, limit);
+    return res.json({ success: true, run_id: runId, data: rows.map(parseAlertRow) });
+  }
+
+  // Fallback: legacy JSON blob
   const alertPath = path.join(__dirname, '../visualization/alerts.json');
   
   if (fs.existsSync(alertPath)) {
     const alerts = JSON.parse(fs.readFileSync(alertPath, 'utf8'));
-    res.json({ success: true, data: alerts });
+    // The blob is appended in time order; return newest first, like the SQLite path
+    res.json({ success: true, data: alerts.slice(-limit).reverse() });
   } else {
     res.json({ success: true, data: [] });
   }
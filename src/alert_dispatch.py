@@ -0,0 +1,316 @@
+"""
+Alert Fan-Out Dispatcher for SURAKSHA AI
+Delivers alerts to city subscribers over SMS/voice gateways with priority, dedup and rate limits
+"""
+import asyncio
+import itertools
+import random
+import time
+
+SEVERITY_RANK = {'SEVERE': 0, 'HIGH': 1, 'MODERATE': 2, 'LOW': 3}
+
+
+class GatewayError(Exception):
+    """Raised by a gateway adapter when a batch could not be delivered"""
+
+
+class TokenBucket:
+    """Async token bucket: `rate` messages per second with bursts up to `capacity`"""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def _wait(self, n):
+        # Requests above capacity wait for a full bucket and then run into debt
+        needed = min(n, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= needed:
+                return
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    async def acquire(self, n=1):
+        """Wait until n tokens are available; waiters are served in FIFO order"""
+        async with self._lock:
+            await self._wait(n)
+            self.tokens -= n
+
+    async def acquire_for(self, n, get):
+        """Wait for n tokens, then spend them on whatever `await get()` returns.
+
+        Tokens are only spent once the item is in hand, so the caller chooses
+        its work after the wait instead of holding it through the wait.
+        """
+        async with self._lock:
+            await self._wait(n)
+            item = await get()
+            self._refill()
+            self.tokens -= n
+            return item
+
+    def release(self, n):
+        """Return unused tokens from an earlier acquire"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + n)
+
+
+class SubscriberDirectory:
+    """City -> channel -> subscriber addresses (lists or ranges)"""
+    def __init__(self):
+        self.subscribers = {}
+
+    def add(self, city, channel, addresses):
+        self.subscribers.setdefault(city, {}).setdefault(channel, []).extend(addresses)
+
+    @classmethod
+    def synthetic(cls, cities, per_city, channels=('sms', 'voice')):
+        """Numeric subscriber ids held as ranges, so millions cost no memory"""
+        directory = cls()
+        offset = 0
+        for city in cities:
+            for channel in channels:
+                directory.subscribers.setdefault(city, {})[channel] = range(offset, offset + per_city)
+                offset += per_city
+        return directory
+
+    def count(self, city):
+        return sum(len(a) for a in self.subscribers.get(city, {}).values())
+
+    def channels(self, city):
+        return list(self.subscribers.get(city, {}))
+
+    def channel_batches(self, city, channel, size):
+        """Yield (channel, recipients) batches of at most `size` for one channel"""
+        addresses = self.subscribers.get(city, {}).get(channel, [])
+        for i in range(0, len(addresses), size):
+            yield channel, addresses[i:i + size]
+
+    def batches(self, city, batch_sizes):
+        """Yield (channel, recipients) batches, interleaving channels round-robin"""
+        per_channel = [
+            self.channel_batches(city, channel, batch_sizes[channel])
+            for channel in self.channels(city) if channel in batch_sizes
+        ]
+
+        for group in itertools.zip_longest(*per_channel):
+            for item in group:
+                if item is not None:
+                    yield item
+
+
+class GatewayAdapter:
+    """Base class for SMS/voice gateways; subclasses implement send_batch"""
+    channel = None
+    max_batch = 1000
+
+    async def send_batch(self, message, recipients):
+        """Deliver message to recipients, return delivered count or raise GatewayError"""
+        raise NotImplementedError
+
+
+class FakeGateway(GatewayAdapter):
+    """Local in-process gateway that simulates latency and failures"""
+    def __init__(self, channel, latency=0.002, failure_rate=0.0, max_batch=1000):
+        self.channel = channel
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_batch = max_batch
+        self.delivered = 0
+        self.batches = 0
+
+    async def send_batch(self, message, recipients):
+        await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise GatewayError(f"{self.channel} gateway rejected batch")
+        self.batches += 1
+        self.delivered += len(recipients)
+        return len(recipients)
+
+
+class AlertDispatcher:
+    """Severity-ordered, deduplicated, rate-limited fan-out to gateway adapters.
+
+    Each channel has its own priority queue and `concurrency` senders. A
+    sender reserves rate-limit tokens for a full batch *before* taking work
+    off the queue, so when the limit binds nobody sits in the token line
+    holding a LOW batch, and the next batch out is always the most severe.
+    """
+    def __init__(self, gateways, directory, rate_limits=None, dedup_window=900,
+                 concurrency=64, max_retries=2, engine=None, language='en'):
+        self.gateways = {g.channel: g for g in gateways}
+        self.directory = directory
+        self.buckets = {
+            channel: TokenBucket(rate) for channel, rate in (rate_limits or {}).items()
+        }
+        self.dedup_window = dedup_window
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.engine = engine
+        self.language = language
+
+        self.queues = {channel: asyncio.PriorityQueue() for channel in self.gateways}
+        self.last_sent = {}
+        self.workers = []
+        self._seq = itertools.count()
+        self._order = itertools.count()
+        self.stats = {'submitted': 0, 'suppressed': 0, 'delivered': 0, 'failed': 0, 'retried': 0}
+        self.completed = {}
+
+    def format_message(self, alert):
+        if self.engine is not None:
+            return self.engine.generate_alert(alert['city'], alert['probability'], self.language)[0]
+        if 'message' in alert:
+            return alert['message']
+        return f"{alert['risk_level']} flood risk in {alert['city']}. Risk: {alert['probability']*100:.1f}%"
+
+    def submit(self, alert, now=None):
+        """Queue an alert unless the city already got one at least as severe within the window"""
+        now = time.monotonic() if now is None else now
+        rank = SEVERITY_RANK[alert['risk_level']]
+        last = self.last_sent.get(alert['city'])
+        if last is not None and now - last[1] < self.dedup_window and rank >= last[0]:
+            self.stats['suppressed'] += 1
+            return False
+
+        self.last_sent[alert['city']] = (rank, now)
+        channels = [c for c in self.directory.channels(alert['city']) if c in self.gateways]
+        job = {
+            'alert': alert,
+            'message': self.format_message(alert),
+            'submitted': time.perf_counter(),
+            'pending': 0,
+            'open_channels': len(channels)
+        }
+        seq = next(self._seq)
+        for channel in channels:
+            batches = self.directory.channel_batches(alert['city'], channel, self.gateways[channel].max_batch)
+            self.queues[channel].put_nowait((rank, seq, next(self._order), job, batches, None))
+        self.stats['submitted'] += 1
+        self._maybe_complete(job)
+        return True
+
+    async def _next_item(self, channel):
+        """Wait for rate-limit tokens first, then take the most severe queued work"""
+        queue = self.queues[channel]
+        bucket = self.buckets.get(channel)
+        if bucket is None:
+            return await queue.get(), None, 0
+        reserved = self.gateways[channel].max_batch
+        return await bucket.acquire_for(reserved, queue.get), bucket, reserved
+
+    async def _worker(self, channel):
+        queue = self.queues[channel]
+        while True:
+            (rank, seq, _, job, batches, retry), bucket, reserved = await self._next_item(channel)
+            try:
+                if retry is None:
+                    batch = next(batches, None)
+                    if batch is None:
+                        job['open_channels'] -= 1
+                        self._maybe_complete(job)
+                        continue
+                    # Put the job back before sending so the next batch of the most severe alert goes first
+                    queue.put_nowait((rank, seq, next(self._order), job, batches, None))
+                    _, recipients = batch
+                    attempt = 0
+                    job['pending'] += 1
+                else:
+                    recipients, attempt = retry
+                if bucket is not None:
+                    bucket.release(reserved - len(recipients))
+                    reserved = 0
+
+                if await self._deliver(rank, seq, job, channel, recipients, attempt):
+                    job['pending'] -= 1
+                    self._maybe_complete(job)
+            finally:
+                if bucket is not None and reserved:
+                    bucket.release(reserved)
+                queue.task_done()
+
+    async def _deliver(self, rank, seq, job, channel, recipients, attempt):
+        """Send one batch; returns False if it was requeued for retry"""
+        try:
+            delivered = await self.gateways[channel].send_batch(job['message'], recipients)
+        except Exception as e:
+            # Real adapters also raise OSError, timeouts etc.; none of them may kill the sender
+            if attempt < self.max_retries:
+                self.stats['retried'] += 1
+                self.queues[channel].put_nowait(
+                    (rank, seq, next(self._order), job, None, (recipients, attempt + 1))
+                )
+                return False
+            if not isinstance(e, GatewayError):
+                print(f"⚠️ {channel} batch failed: {e!r}")
+            self.stats['failed'] += len(recipients)
+            return True
+
+        self.stats['delivered'] += delivered
+        return True
+
+    def _maybe_complete(self, job):
+        if job['open_channels'] == 0 and job['pending'] == 0 and 'done' not in job:
+            job['done'] = time.perf_counter()
+            level = job['alert']['risk_level']
+            self.completed.setdefault(level, []).append(job['done'] - job['submitted'])
+
+    def start(self):
+        self.workers = [
+            asyncio.create_task(self._worker(channel))
+            for channel in self.gateways for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Cancel the senders without waiting for queued alerts"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def drain(self):
+        """Wait for all queued alerts to be delivered, then stop the workers"""
+        for queue in self.queues.values():
+            await queue.join()
+        await self.stop()
+
+
+async def benchmark_dispatch(num_cities=20, subscribers_per_city=50000, channels=('sms', 'voice'),
+                             rate_per_channel=500000, gateway_latency=0.002, concurrency=64):
+    """Sustained throughput of fake-gateway fan-out, one alert per city per severity"""
+    cities = [f"City{i}" for i in range(num_cities)]
+    directory = SubscriberDirectory.synthetic(cities, subscribers_per_city, channels)
+    gateways = [FakeGateway(channel, latency=gateway_latency) for channel in channels]
+    dispatcher = AlertDispatcher(
+        gateways, directory,
+        rate_limits={channel: rate_per_channel for channel in channels},
+        concurrency=concurrency
+    )
+
+    start = time.perf_counter()
+    dispatcher.start()
+    for level in ['LOW', 'MODERATE', 'HIGH', 'SEVERE']:
+        for city in cities:
+            dispatcher.submit({'city': city, 'risk_level': level, 'probability': 0.9})
+    await dispatcher.drain()
+    elapsed = time.perf_counter() - start
+
+    delivered = dispatcher.stats['delivered']
+    print(f"  ✓ Delivered {delivered:,} messages in {elapsed:.2f}s "
+          f"({delivered / elapsed:,.0f} msg/s)")
+    for level in ['SEVERE', 'HIGH', 'MODERATE', 'LOW']:
+        times = sorted(dispatcher.completed.get(level, []))
+        if times:
+            print(f"    {level:<9} median completion {times[len(times) // 2]:.2f}s")
+    return dispatcher.stats, elapsed
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_dispatch())
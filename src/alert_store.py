@@ -0,0 +1,194 @@
+"""
+Alert Store for SURAKSHA AI
+Append-only SQLite alert history with indexed queries for the API
+"""
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+SEVERITY_LEVELS = {'LOW': 0, 'MODERATE': 1, 'HIGH': 2, 'SEVERE': 3}
+
+COLUMNS = ['run_id', 'timestep', 'time', 'city', 'risk_level', 'severity',
+           'probability', 'rainfall', 'river_level', 'details']
+
+# timestep is a per-run simulation index, so every timestep query is scoped to
+# one run and indexed by run first; latest_alerts keeps "latest per city" O(cities)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    created TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    timestep INTEGER,
+    time TEXT,
+    city TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    probability REAL,
+    rainfall REAL,
+    river_level REAL,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS latest_alerts (
+    city TEXT PRIMARY KEY,
+    alert_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_run_timestep ON alerts (run_id, timestep);
+CREATE INDEX IF NOT EXISTS idx_alerts_run_city ON alerts (run_id, city, timestep);
+CREATE INDEX IF NOT EXISTS idx_alerts_run_severity ON alerts (run_id, severity);
+CREATE INDEX IF NOT EXISTS idx_alerts_time ON alerts (time);
+"""
+
+
+def _optional(value, cast):
+    return None if value is None else cast(value)
+
+
+class AlertStore:
+    def __init__(self, db_path='visualization/alerts.db'):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets the API server read while the simulation appends
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def start_run(self, source=None):
+        """Register a new run and return its id (timestamp plus a random suffix, so never reused)"""
+        now = datetime.now()
+        run_id = f"{now:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, created, source) VALUES (?, ?, ?)",
+                (run_id, now.isoformat(timespec='seconds'), source)
+            )
+        return run_id
+
+    def latest_run(self):
+        row = self.conn.execute("SELECT run_id FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def runs(self, limit=20):
+        """Newest runs first"""
+        return [dict(row) for row in self.conn.execute(
+            "SELECT run_id, created, source FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+        )]
+
+    def _to_row(self, alert, run_id):
+        known = {'timestep', 'time', 'city', 'risk_level', 'probability', 'rainfall', 'river_level'}
+        details = {k: v for k, v in alert.items() if k not in known}
+        return (
+            run_id,
+            _optional(alert.get('timestep'), int),
+            # The alert's own time; NULL when the producer (e.g. the simulation) has none
+            _optional(alert.get('time'), str),
+            alert['city'],
+            alert['risk_level'],
+            SEVERITY_LEVELS[alert['risk_level']],
+            _optional(alert.get('probability'), float),
+            _optional(alert.get('rainfall'), float),
+            _optional(alert.get('river_level'), float),
+            json.dumps(details, default=str) if details else None
+        )
+
+    def _write_batch(self, sql, batch):
+        with self.conn:
+            first_new = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+            self.conn.executemany(sql, batch)
+            # Only this batch's rows are scanned, via the rowid range
+            self.conn.execute(
+                """INSERT INTO latest_alerts (city, alert_id)
+                   SELECT city, MAX(id) FROM alerts WHERE id > ? GROUP BY city
+                   ON CONFLICT(city) DO UPDATE SET alert_id = excluded.alert_id""",
+                (first_new,)
+            )
+
+    def insert_many(self, alerts, run_id=None, batch_size=5000):
+        """Append alerts in batched transactions under run_id (a new run if None).
+
+        Returns (run_id, number written).
+        """
+        if run_id is None:
+            run_id = self.start_run()
+        else:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO runs (run_id, created) VALUES (?, ?)",
+                    (run_id, datetime.now().isoformat(timespec='seconds'))
+                )
+        sql = f"INSERT INTO alerts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+        written = 0
+        batch = []
+        for alert in alerts:
+            batch.append(self._to_row(alert, run_id))
+            if len(batch) >= batch_size:
+                self._write_batch(sql, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            self._write_batch(sql, batch)
+            written += len(batch)
+        return run_id, written
+
+    def _query(self, sql, params=()):
+        alerts = []
+        for row in self.conn.execute(sql, params):
+            alert = dict(row)
+            details = alert.pop('details')
+            if details:
+                alert.update(json.loads(details))
+            alerts.append(alert)
+        return alerts
+
+    def latest_per_city(self):
+        """Most recently stored alert for every city"""
+        return self._query(
+            "SELECT alerts.* FROM latest_alerts JOIN alerts ON alerts.id = latest_alerts.alert_id "
+            "ORDER BY latest_alerts.city"
+        )
+
+    def time_range(self, start, end, field='timestep', city=None, run_id=None, limit=1000):
+        """Alerts with start <= field <= end.
+
+        field='timestep' is only meaningful within one run, so it is scoped to
+        run_id (default: the latest run); field='time' spans all runs unless
+        run_id is given.
+        """
+        if field not in ('timestep', 'time'):
+            raise ValueError("field must be 'timestep' or 'time'")
+        if field == 'timestep' and run_id is None:
+            run_id = self.latest_run()
+        sql = f"SELECT * FROM alerts WHERE {field} BETWEEN ? AND ?"
+        params = [start, end]
+        if run_id is not None:
+            sql += " AND run_id = ?"
+            params.append(run_id)
+        if city is not None:
+            sql += " AND city = ?"
+            params.append(city)
+        sql += f" ORDER BY {field}, id LIMIT ?"
+        return self._query(sql, params + [limit])
+
+    def at_least(self, risk_level, run_id=None, limit=1000):
+        """Alerts with severity >= risk_level in one run (default: the latest), most severe then newest first"""
+        return self._query(
+            "SELECT * FROM alerts WHERE run_id = ? AND severity >= ? ORDER BY severity DESC, id DESC LIMIT ?",
+            (run_id or self.latest_run(), SEVERITY_LEVELS[risk_level], limit)
+        )
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
@@ -0,0 +1,390 @@
+"""
+Real-Time Telemetry Ingestion for SURAKSHA AI
+Streams gauge readings through bounded asyncio queues into batched risk scoring
+"""
+import asyncio
+import bisect
+import json
+import math
+import time
+from collections import deque
+
+import pandas as pd
+
+from src.data_processing import ROLLING_WINDOWS, freq_to_timedelta
+
+FEATURE_COLS = ['rainfall', 'river_level', 'rainfall_3day', 'rainfall_7day', 'river_rise']
+
+
+def parse_reading(line):
+    """Parse one JSON or CSV (date,city,rainfall,river_level) line into a reading"""
+    line = line.strip()
+    if not line or line.startswith('date,'):
+        return None
+
+    try:
+        if line.startswith('{'):
+            record = json.loads(line)
+        else:
+            date, city, rainfall, river_level = line.split(',')[:4]
+            record = {'date': date, 'city': city, 'rainfall': rainfall, 'river_level': river_level}
+
+        timestamp = pd.to_datetime(record.get('date'))
+        if pd.isna(timestamp):
+            return None
+        return {
+            'date': record.get('date'),
+            'time': timestamp,
+            'city': record['city'],
+            'rainfall': float(record['rainfall']),
+            'river_level': float(record['river_level'])
+        }
+    except (ValueError, KeyError):
+        return None
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (milliseconds)"""
+    def __init__(self, min_ms=0.01, max_ms=60000, buckets_per_decade=10):
+        decades = math.log10(max_ms / min_ms)
+        num_bounds = int(decades * buckets_per_decade) + 1
+        self.bounds = [min_ms * 10 ** (i / buckets_per_decade) for i in range(num_bounds)]
+        self.counts = [0] * (num_bounds + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds):
+        """Record one latency sample given in seconds"""
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Upper bucket bound containing the q-th percentile"""
+        if self.count == 0:
+            return 0.0
+
+        target = q / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target and c:
+                return min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms
+        }
+
+
+class FileTailSource:
+    """Tail a CSV/JSON-lines file, optionally following appended readings"""
+    def __init__(self, path, follow=True, poll_interval=0.2):
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval
+
+    async def readings(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            pending = ''
+            while True:
+                chunk = f.readline()
+                if not chunk:
+                    if not self.follow:
+                        # Not following: an unterminated last line is complete
+                        reading = parse_reading(pending)
+                        if reading is not None:
+                            yield reading
+                        return
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                # A writer may have flushed only part of a line; wait for its newline
+                pending += chunk
+                if not pending.endswith('\n'):
+                    continue
+                line, pending = pending, ''
+
+                reading = parse_reading(line)
+                if reading is not None:
+                    yield reading
+
+
+class TCPSource:
+    """Accept newline-delimited readings from local TCP clients"""
+    def __init__(self, host='127.0.0.1', port=9009, queue_size=1000):
+        self.host = host
+        self.port = port
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    async def _handle_client(self, reader, writer):
+        # Awaiting put() stops reading the socket when full, so TCP flow control pushes back on senders
+        while line := await reader.readline():
+            reading = parse_reading(line.decode('utf-8', errors='ignore'))
+            if reading is not None:
+                await self._queue.put(reading)
+        writer.close()
+
+    async def readings(self):
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        async with server:
+            while True:
+                yield await self._queue.get()
+
+
+class UDPSource:
+    """Receive readings as UDP datagrams (one or more lines per datagram)"""
+    def __init__(self, host='127.0.0.1', port=9010, queue_size=1000):
+        self.host = host
+        self.port = port
+        self.dropped = 0
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    def _on_datagram(self, data):
+        for line in data.decode('utf-8', errors='ignore').splitlines():
+            reading = parse_reading(line)
+            if reading is None:
+                continue
+            # UDP has no flow control: shed load instead of blocking the event loop
+            try:
+                self._queue.put_nowait(reading)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    async def readings(self):
+        loop = asyncio.get_running_loop()
+        source = self
+
+        class _Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                source._on_datagram(data)
+
+        transport, _ = await loop.create_datagram_endpoint(
+            _Protocol, local_addr=(self.host, self.port)
+        )
+        try:
+            while True:
+                yield await self._queue.get()
+        finally:
+            transport.close()
+
+
+class CityFeatureState:
+    """Rolling per-city state matching FloodDataProcessor.engineer_features at the same freq.
+
+    Readings are placed on the freq calendar by their time. Rainfall windows
+    are durations, so they cover the same span whatever the cadence or
+    dropped readings, and river rise is per calendar step over the time
+    actually elapsed since the previous reading. A reading in the same or an
+    earlier step than the last one is a duplicate (or late) and is dropped.
+    """
+    def __init__(self, freq='D', windows=None):
+        self.freq = freq
+        self.step = freq_to_timedelta(freq)
+        # name -> [duration, deque of (step time, rainfall), running total]
+        self.windows = {
+            name: [pd.Timedelta(window), deque(), 0.0]
+            for name, window in (windows or ROLLING_WINDOWS).items()
+        }
+        self.last_time = None
+        self.last_level = None
+
+    def update(self, timestamp, rainfall, river_level):
+        """Feature row (FEATURE_COLS order) for one reading, or None if it is a duplicate"""
+        step_time = pd.Timestamp(timestamp).floor(self.freq)
+        if self.last_time is not None and step_time <= self.last_time:
+            return None
+
+        rise = 0.0
+        if self.last_level is not None:
+            rise = (river_level - self.last_level) * (self.step / (step_time - self.last_time))
+        self.last_time, self.last_level = step_time, river_level
+
+        features = {'rainfall': rainfall, 'river_level': river_level, 'river_rise': rise}
+        for name, window in self.windows.items():
+            duration, readings, _ = window
+            readings.append((step_time, rainfall))
+            window[2] += rainfall
+            while readings[0][0] <= step_time - duration:
+                window[2] -= readings.popleft()[1]
+            features[name] = window[2]
+        return [features[col] for col in FEATURE_COLS]
+
+
+class IngestionPipeline:
+    """Source -> bounded queue -> micro-batched features -> batch scoring -> alerts"""
+    def __init__(self, engine, source, queue_size=1000, batch_size=256, batch_timeout=0.05,
+                 max_pending_batches=4, alert_threshold=0.6, on_alert=None, language='en',
+                 freq='D', windows=None):
+        self.engine = engine
+        self.source = source
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.alert_threshold = alert_threshold
+        self.on_alert = on_alert
+        self.language = language
+        self.freq = freq
+        self.windows = windows
+
+        self.queue_size = queue_size
+        self.max_pending_batches = max_pending_batches
+        self.city_state = {}
+        self.alerts = []
+        self.stats = {'readings': 0, 'batches': 0, 'alerts': 0, 'backpressure_waits': 0, 'duplicates': 0}
+        self.latency = {
+            stage: LatencyHistogram()
+            for stage in ['queue', 'features', 'scoring', 'emit', 'end_to_end']
+        }
+
+    async def _ingest(self, raw_queue):
+        """Stamp readings and enqueue them; blocks when downstream falls behind"""
+        async for reading in self.source.readings():
+            reading['_received'] = time.perf_counter()
+            if raw_queue.full():
+                self.stats['backpressure_waits'] += 1
+            await raw_queue.put(reading)
+            self.stats['readings'] += 1
+        await raw_queue.put(None)
+
+    async def _batch(self, raw_queue, score_queue):
+        """Collect up to batch_size readings (or batch_timeout) and compute features"""
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            first = await raw_queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(raw_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            batched_at = time.perf_counter()
+            readings = []
+            features = []
+            for reading in batch:
+                self.latency['queue'].record(batched_at - reading['_received'])
+                state = self.city_state.get(reading['city'])
+                if state is None:
+                    state = self.city_state[reading['city']] = CityFeatureState(self.freq, self.windows)
+                row = state.update(reading['time'], reading['rainfall'], reading['river_level'])
+                if row is None:
+                    self.stats['duplicates'] += 1
+                    continue
+                readings.append(reading)
+                features.append(row)
+            self.latency['features'].record(time.perf_counter() - batched_at)
+            if not readings:
+                continue
+            batch = readings
+
+            if score_queue.full():
+                self.stats['backpressure_waits'] += 1
+            await score_queue.put((batch, features))
+        await score_queue.put(None)
+
+    async def _score(self, score_queue):
+        """Score whole batches off the event loop and emit alerts"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await score_queue.get()
+            if item is None:
+                break
+
+            batch, features = item
+            start = time.perf_counter()
+            probabilities = await loop.run_in_executor(None, self.engine.predict_risk_batch, features)
+            scored_at = time.perf_counter()
+            self.latency['scoring'].record(scored_at - start)
+            self.stats['batches'] += 1
+
+            for reading, row, probability in zip(batch, features, probabilities):
+                if probability >= self.alert_threshold:
+                    await self._emit(reading, row, float(probability))
+            self.latency['emit'].record(time.perf_counter() - scored_at)
+
+    async def _emit(self, reading, features, probability):
+        risk_level, _ = self.engine.get_risk_level(probability)
+        message, color = self.engine.generate_alert(reading['city'], probability, self.language)
+        alert = {
+            'date': reading['date'],
+            'city': reading['city'],
+            'risk_level': risk_level,
+            'probability': probability,
+            'rainfall': reading['rainfall'],
+            'river_level': reading['river_level'],
+            'features': dict(zip(FEATURE_COLS, features)),
+            'message': message,
+            'color': color
+        }
+
+        if self.on_alert is not None:
+            result = self.on_alert(alert)
+            if asyncio.iscoroutine(result):
+                await result
+        else:
+            self.alerts.append(alert)
+
+        self.stats['alerts'] += 1
+        self.latency['end_to_end'].record(time.perf_counter() - reading['_received'])
+
+    async def run(self):
+        """Run until the source is exhausted (or the task is cancelled)"""
+        raw_queue = asyncio.Queue(maxsize=self.queue_size)
+        score_queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        await asyncio.gather(
+            self._ingest(raw_queue),
+            self._batch(raw_queue, score_queue),
+            self._score(score_queue)
+        )
+        return self.report()
+
+    def report(self):
+        """Throughput counters and per-stage latency summaries"""
+        return {
+            'stats': dict(self.stats),
+            'latency': {stage: hist.summary() for stage, hist in self.latency.items()}
+        }
+
+
+def print_report(report):
+    stats = report['stats']
+    print(f"  ✓ Readings: {stats['readings']}  Duplicates dropped: {stats['duplicates']}  "
+          f"Batches: {stats['batches']}  Alerts: {stats['alerts']}  "
+          f"Backpressure waits: {stats['backpressure_waits']}")
+    for stage, s in report['latency'].items():
+        print(f"    {stage:<11} n={s['count']:<7} p50={s['p50_ms']:.2f}ms "
+              f"p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms max={s['max_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    import sys
+    from src.risk_engine import RiskAnalyticsEngine
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.ingestion <readings.csv|readings.jsonl>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    pipeline = IngestionPipeline(RiskAnalyticsEngine(), FileTailSource(path, follow=False))
+    print_report(asyncio.run(pipeline.run()))
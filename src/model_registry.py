@@ -0,0 +1,258 @@
+"""
+Versioned Model Registry for SURAKSHA AI
+Publishes Random Forest artifacts, memory-maps them for sharing across workers and hot-swaps versions
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+FOREST_ARRAYS = ['feature', 'threshold', 'left', 'right', 'proba', 'roots']
+
+
+class FlatForest:
+    """Random Forest flattened into plain arrays that np.load can memory-map.
+
+    sklearn copies tree nodes into private memory when unpickling, so a
+    joblib mmap_mode load still gives every worker its own forest. These
+    arrays stay on shared, read-only file-backed pages instead.
+    """
+    def __init__(self, feature, threshold, left, right, proba, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.proba = proba
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_sklearn(cls, rf_model):
+        """Concatenate all estimator trees, with leaves pointing at themselves"""
+        positive = list(rf_model.classes_).index(1) if 1 in rf_model.classes_ else len(rf_model.classes_) - 1
+        parts = {name: [] for name in FOREST_ARRAYS}
+        offset = 0
+        max_depth = 0
+        for estimator in rf_model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            values = tree.value[:, 0, :]
+            values = values / values.sum(axis=1, keepdims=True)
+
+            parts['feature'].append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            parts['threshold'].append(tree.threshold.astype(np.float64))
+            parts['left'].append((np.where(is_leaf, nodes, tree.children_left) + offset).astype(np.int32))
+            parts['right'].append((np.where(is_leaf, nodes, tree.children_right) + offset).astype(np.int32))
+            parts['proba'].append(values[:, positive].astype(np.float64))
+            parts['roots'].append(np.array([offset], dtype=np.int32))
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        return cls(max_depth=max_depth, n_features=rf_model.n_features_in_, **arrays)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'forest.json'), 'w') as f:
+            json.dump({'max_depth': self.max_depth, 'n_features': self.n_features_in_}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, 'forest.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in FOREST_ARRAYS
+        }
+        return cls(**arrays, **meta)
+
+    def apply(self, X):
+        """Leaf node index for every (row, tree), like RandomForestClassifier.apply"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.broadcast_to(np.asarray(self.roots), (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        positive = self.proba[self.apply(X)].mean(axis=1)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+class ModelRegistry:
+    """models/registry/versions/<version>/ plus an atomically replaced CURRENT pointer"""
+    def __init__(self, root='models/registry'):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.current_path = os.path.join(root, 'CURRENT')
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(v for v in os.listdir(self.versions_dir) if not v.startswith('.'))
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def publish(self, rf_model, version=None, metadata=None, make_current=True):
+        """Write a complete version directory, then optionally point CURRENT at it"""
+        version = version or datetime.now().strftime('v%Y%m%d-%H%M%S-%f')
+        final_dir = self.version_dir(version)
+        if os.path.exists(final_dir):
+            raise ValueError(f"Model version {version} already exists")
+
+        # Build under a hidden name and rename, so readers never see a half-written version
+        tmp_dir = os.path.join(self.versions_dir, f".{version}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        joblib.dump(rf_model, os.path.join(tmp_dir, 'rf_model.pkl'))
+        FlatForest.from_sklearn(rf_model).save(os.path.join(tmp_dir, 'forest'))
+        with open(os.path.join(tmp_dir, 'metadata.json'), 'w') as f:
+            json.dump({'version': version, 'created': datetime.now().isoformat(), **(metadata or {})}, f)
+        os.rename(tmp_dir, final_dir)
+
+        if make_current:
+            self.set_current(version)
+        return version
+
+    def set_current(self, version):
+        """Atomically repoint CURRENT (also used for rollback)"""
+        if not os.path.isdir(self.version_dir(version)):
+            raise ValueError(f"Unknown model version {version}")
+        tmp_path = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_path)
+
+    def current_version(self):
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None, mmap=True):
+        """Load a version's forest (memory-mapped by default) or the full sklearn model"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No current model in {self.root}")
+        if mmap:
+            return FlatForest.load(os.path.join(self.version_dir(version), 'forest'))
+        return joblib.load(os.path.join(self.version_dir(version), 'rf_model.pkl'))
+
+
+class HotSwapModel:
+    """Follows the registry's CURRENT pointer and swaps models between requests.
+
+    Callers take a reference via `get()`; a swap only rebinds the attribute,
+    so requests already holding the old model finish on it. A version that
+    fails to load is logged and the old model stays in service.
+    """
+    def __init__(self, registry, poll_interval=5.0, mmap=True):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.mmap = mmap
+        self.version = None
+        self.model = None
+        self.swap_latencies = []
+        self._last_poll = time.monotonic()
+        # An empty registry (or an unloadable CURRENT) leaves model None until a poll succeeds
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Check CURRENT (at most once per poll_interval) and swap if it moved"""
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.poll_interval:
+            return False
+        self._last_poll = now
+
+        version = self.registry.current_version()
+        if version is None or version == self.version:
+            return False
+
+        start = time.perf_counter()
+        try:
+            model = self.registry.load(version, mmap=self.mmap)
+        except Exception as e:
+            # Keep serving the current model; the next poll tries again
+            print(f"⚠️ Could not load model version {version}: {e!r}")
+            return False
+        self.model, self.version = model, version
+        self.swap_latencies.append(time.perf_counter() - start)
+        return True
+
+    def get(self):
+        self.refresh()
+        return self.model
+
+
+def memory_usage():
+    """RSS and PSS (proportional share of shared pages) in MB for this process"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, value = line.split(':', 1)
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Private_Clean', 'Private_Dirty'):
+                    usage[key.lower()] = int(value.split()[0]) / 1024
+    except (FileNotFoundError, ValueError):
+        pass
+    return usage
+
+
+def _worker_memory(args):
+    root, mmap, rows = args
+    model = ModelRegistry(root).load(mmap=mmap)
+    X = np.random.default_rng(0).random((rows, model.n_features_in_)) * 100
+    model.predict_proba(X)
+    return os.getpid(), memory_usage()
+
+
+def benchmark_workers(root='models/registry', num_workers=4, rows=2000):
+    """Report per-worker memory for mmap vs private loads, and hot-swap latency"""
+    import multiprocessing
+
+    registry = ModelRegistry(root)
+    context = multiprocessing.get_context('fork')
+    for mmap in (True, False):
+        label = 'mmap FlatForest' if mmap else 'joblib sklearn'
+        with context.Pool(num_workers) as pool:
+            results = pool.map(_worker_memory, [(root, mmap, rows)] * num_workers)
+        print(f"  {label}:")
+        for pid, usage in results:
+            print(f"    worker {pid}: RSS {usage.get('rss', 0):.1f} MB  PSS {usage.get('pss', 0):.1f} MB  "
+                  f"private {usage.get('private_clean', 0) + usage.get('private_dirty', 0):.1f} MB")
+
+    # Swap back and forth between the two newest versions
+    versions = registry.versions()
+    if len(versions) >= 2:
+        handle = HotSwapModel(registry)
+        for version in versions[-2:] * 3:
+            registry.set_current(version)
+            handle.refresh(force=True)
+        if handle.swap_latencies:
+            latencies = sorted(handle.swap_latencies)
+            print(f"  ✓ Hot swap latency: median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+                  f"max {latencies[-1] * 1000:.2f} ms over {len(latencies)} swaps")
+
+
+if __name__ == "__main__":
+    registry = ModelRegistry()
+    if not registry.versions() and os.path.exists('models/rf_model.pkl'):
+        print(f"  ✓ Published {registry.publish(joblib.load('models/rf_model.pkl'))}")
+    benchmark_workers()
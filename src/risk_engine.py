@@ -3,26 +3,60 @@ Risk Analytics Engine - Converts ML output to human-readable alerts
 """
 import joblib
 import numpy as np
-from tensorflow import keras
 
 class RiskAnalyticsEngine:
-    def __init__(self, rf_model_path='models/rf_model.pkl', lstm_model_path='models/lstm_model.h5'):
+    def __init__(self, rf_model_path='models/rf_model.pkl', lstm_model_path='models/lstm_model.h5',
+                 registry_path=None, poll_interval=5.0):
+        self.model_handle = None
+        self.rf_model = None
+
+        # Memory-mapped, hot-swappable Random Forest from the model registry. The
+        # handle keeps polling even if the registry is still empty, so the pickle
+        # below only serves until a version is published
+        if registry_path:
+            from src.model_registry import ModelRegistry, HotSwapModel
+            self.model_handle = HotSwapModel(ModelRegistry(registry_path), poll_interval=poll_interval)
+            self.rf_model = self.model_handle.model
+
+        self.fallback_model = None
+        if self.rf_model is None:
+            try:
+                self.fallback_model = self.rf_model = joblib.load(rf_model_path)
+            except Exception:
+                print("Random Forest model not found. Train models first.")
+
+        # TensorFlow is optional: without it only the LSTM forecast falls back
         try:
-            self.rf_model = joblib.load(rf_model_path)
+            from tensorflow import keras
             self.lstm_model = keras.models.load_model(lstm_model_path)
-        except:
-            print("Models not found. Train models first.")
-            self.rf_model = None
+        except Exception:
+            print("LSTM model unavailable (TensorFlow missing or model not trained).")
             self.lstm_model = None
     
+    def current_rf_model(self):
+        """Random Forest to use for this request, picking up registry swaps"""
+        if self.model_handle is not None:
+            model = self.model_handle.get()
+            self.rf_model = self.fallback_model if model is None else model
+        return self.rf_model
+    
     def predict_risk(self, features):
         """Predict flood risk using Random Forest"""
-        if self.rf_model is None:
+        rf_model = self.current_rf_model()
+        if rf_model is None:
             return 0.5  # Default moderate risk
         
-        risk_prob = self.rf_model.predict_proba([features])[0][1]
+        risk_prob = rf_model.predict_proba([features])[0][1]
         return risk_prob
     
+    def predict_risk_batch(self, feature_rows):
+        """Predict flood risk for many feature rows in one model call"""
+        rf_model = self.current_rf_model()
+        if rf_model is None:
+            return np.full(len(feature_rows), 0.5)
+        
+        return rf_model.predict_proba(np.asarray(feature_rows, dtype=float))[:, 1]
+    
     def forecast_timeseries(self, sequence):
         """Forecast using LSTM"""
         if self.lstm_model is None:
@@ -6,11 +6,37 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+# Real Indian cities
+REAL_CITIES = [
+    ('Mumbai', 19.0760, 72.8777),
+    ('Delhi', 28.7041, 77.1025),
+    ('Kolkata', 22.5726, 88.3639),
+    ('Chennai', 13.0827, 80.2707),
+    ('Bangalore', 12.9716, 77.5946),
+    ('Hyderabad', 17.3850, 78.4867),
+    ('Ahmedabad', 23.0225, 72.5714),
+    ('Pune', 18.5204, 73.8567),
+    ('Surat', 21.1702, 72.8311),
+    ('Jaipur', 26.9124, 75.7873),
+    ('Lucknow', 26.8467, 80.9462),
+    ('Kanpur', 26.4499, 80.3319),
+    ('Nagpur', 21.1458, 79.0882),
+    ('Indore', 22.7196, 75.8577),
+    ('Bhopal', 23.2599, 77.4126),
+    ('Patna', 25.5941, 85.1376),
+    ('Vadodara', 22.3072, 73.1812),
+    ('Ghaziabad', 28.6692, 77.4538),
+    ('Ludhiana', 30.9010, 75.8573),
+    ('Agra', 27.1767, 78.0081),
+]
+
 class FloodSimulation:
     def __init__(self, data_path=None):
         self.data = None
         self.rf_model = None
         self.alert_data = []
+        self.model_features = None
+        self.attributor = None
         if data_path:
             self.data = pd.read_csv(data_path)
     
@@ -24,35 +50,12 @@ class FloodSimulation:
     
     def generate_sample_data(self, num_cities=20, num_timesteps=50):
         """Generate sample simulation data with ML predictions"""
-        # Real Indian cities
-        real_cities = [
-            ('Mumbai', 19.0760, 72.8777),
-            ('Delhi', 28.7041, 77.1025),
-            ('Kolkata', 22.5726, 88.3639),
-            ('Chennai', 13.0827, 80.2707),
-            ('Bangalore', 12.9716, 77.5946),
-            ('Hyderabad', 17.3850, 78.4867),
-            ('Ahmedabad', 23.0225, 72.5714),
-            ('Pune', 18.5204, 73.8567),
-            ('Surat', 21.1702, 72.8311),
-            ('Jaipur', 26.9124, 75.7873),
-            ('Lucknow', 26.8467, 80.9462),
-            ('Kanpur', 26.4499, 80.3319),
-            ('Nagpur', 21.1458, 79.0882),
-            ('Indore', 22.7196, 75.8577),
-            ('Bhopal', 23.2599, 77.4126),
-            ('Patna', 25.5941, 85.1376),
-            ('Vadodara', 22.3072, 73.1812),
-            ('Ghaziabad', 28.6692, 77.4538),
-            ('Ludhiana', 30.9010, 75.8573),
-            ('Agra', 27.1767, 78.0081),
-        ]
-        
-        cities = [c[0] for c in real_cities[:num_cities]]
-        lats = [c[1] for c in real_cities[:num_cities]]
-        lons = [c[2] for c in real_cities[:num_cities]]
+        cities = [c[0] for c in REAL_CITIES[:num_cities]]
+        lats = [c[1] for c in REAL_CITIES[:num_cities]]
+        lons = [c[2] for c in REAL_CITIES[:num_cities]]
         
         data = []
+        model_features = []
         for t in range(num_timesteps):
             for i, city in enumerate(cities):
                 # Simulate realistic patterns
@@ -68,8 +71,11 @@ class FloodSimulation:
                     features = [rainfall, river_level, rainfall * 0.8, rainfall * 0.6, 0.5]
                     try:
                         risk = self.rf_model.predict_proba([features])[0][1]
+                        model_features.append(features)
                     except:
                         risk = np.clip(base_risk + seasonal + noise, 0, 1)
+                        # Heuristic risk: nothing for the model to explain
+                        model_features.append([np.nan] * len(features))
                 else:
                     risk = np.clip(base_risk + seasonal + noise, 0, 1)
                 
@@ -84,10 +90,77 @@ class FloodSimulation:
                 })
         
         self.data = pd.DataFrame(data)
+        # Exact model inputs per row, kept for alert attributions
+        self.model_features = np.array(model_features) if self.rf_model else None
         return self.data
     
-    def generate_alert_data(self):
-        """Generate alert data for voice agent"""
+    def generate_grid_data(self, num_cities=20, num_timesteps=50, grid_shape=(512, 512),
+                           steps_per_timestep=4, tile_size=256, elevation=None, keep_frames=True):
+        """Run the gridded inundation simulation and sample city risk from the depth raster"""
+        from src.inundation import InundationGrid, generate_synthetic_dem, depth_to_risk
+        
+        cities = [c[0] for c in REAL_CITIES[:num_cities]]
+        lats = np.array([c[1] for c in REAL_CITIES[:num_cities]])
+        lons = np.array([c[2] for c in REAL_CITIES[:num_cities]])
+        
+        if elevation is None:
+            elevation = generate_synthetic_dem(grid_shape)
+        self.grid = InundationGrid(elevation, tile_size=tile_size)
+        self.depth_frames = []
+        
+        data = []
+        for t in range(num_timesteps):
+            base_risk = 0.15 + (t / num_timesteps) * 0.6
+            rainfall = np.maximum(0, 30 + base_risk * 80 + np.random.normal(0, 15, num_cities))
+            river_level = np.maximum(0, 2 + base_risk * 8 + np.random.normal(0, 1, num_cities))
+            
+            self.grid.add_rainfall(self.grid.interpolate_gauges(lats, lons, rainfall))
+            self.grid.add_gauge_overflow(lats, lons, river_level)
+            for _ in range(steps_per_timestep):
+                self.grid.step()
+            depth = self.grid.depth
+            
+            if keep_frames:
+                self.depth_frames.append(depth.copy())
+            
+            risk = depth_to_risk(self.grid.sample(lats, lons))
+            for i, city in enumerate(cities):
+                data.append({
+                    'timestep': t,
+                    'city': city,
+                    'lat': lats[i],
+                    'lon': lons[i],
+                    'flood_risk': float(risk[i]),
+                    'rainfall': round(float(rainfall[i]), 1),
+                    'river_level': round(float(river_level[i]), 2)
+                })
+        
+        self.data = pd.DataFrame(data)
+        self.model_features = None
+        return self.data
+    
+    def export_risk_tiles(self, output_dir='visualization/tiles', max_zoom=6, tile_format='png'):
+        """Render the grid depth frames into a cached Web Mercator risk tile pyramid"""
+        from src.inundation import depth_to_risk
+        from src.tiles import TilePyramidBuilder
+        
+        if not getattr(self, 'depth_frames', None):
+            print("  ⚠ No grid frames, run generate_grid_data first")
+            return None
+        
+        builder = TilePyramidBuilder(output_dir, max_zoom=max_zoom, tile_format=tile_format)
+        frames = (depth_to_risk(frame) for frame in self.depth_frames)
+        return builder.build(frames, bounds=self.grid.bounds)
+    
+    def get_attributor(self):
+        """Feature attributor for the loaded Random Forest, built once per model"""
+        from src.attribution import ForestAttributor
+        if self.attributor is None or self.attributor.model is not self.rf_model:
+            self.attributor = ForestAttributor(self.rf_model)
+        return self.attributor
+    
+    def generate_alert_data(self, store_path='visualization/alerts.db', attribution_budget=0.5):
+        """Generate alert data for voice agent and append it to the alert store"""
         if self.data is None:
             return
         
@@ -106,14 +179,35 @@ class FloodSimulation:
                 'river_level': row['river_level']
             })
         
+        # Top feature drivers for alerts scored by the Random Forest
+        if self.model_features is not None and alerts:
+            features = self.model_features[high_risk.index]
+            scored = np.flatnonzero(~np.isnan(features).any(axis=1))
+            explained = self.get_attributor().explain_alerts(
+                [alerts[i] for i in scored], features[scored], time_budget=attribution_budget
+            )
+            print(f"  ✓ Attributed {explained}/{len(alerts)} alerts")
+        
         # Save for JavaScript
         alert_df = pd.DataFrame(alerts)
         alert_df.to_json('visualization/alerts.json', orient='records')
         self.alert_data = alerts
+        
+        # Indexed history for the API server
+        if store_path:
+            from src.alert_store import AlertStore
+            store = AlertStore(store_path)
+            run_id, _ = store.insert_many(alerts, run_id=store.start_run('simulation'))
+            store.close()
+            print(f"  ✓ Stored alerts as run {run_id}")
         print(f"  ✓ Generated {len(alerts)} alert events")
     
-    def create_animated_map(self, output_path='visualization/flood_map.html'):
-        """Create animated geospatial visualization"""
+    def create_animated_map(self, output_path='visualization/flood_map.html', tile_url=None):
+        """Create animated geospatial visualization.
+
+        With tile_url (e.g. http://127.0.0.1:8765/tiles from serve_tiles), each
+        frame also draws that timestep's risk heatmap tiles under the cities.
+        """
         if self.data is None:
             self.generate_sample_data()
         
@@ -150,9 +244,20 @@ class FloodSimulation:
         fig.update_layout(
             height=700,
             font=dict(size=14),
-            mapbox_style='open-street-map'
+            map_style='open-street-map'
         )
         
+        if tile_url:
+            def risk_layers(timestep):
+                return [{
+                    'sourcetype': 'raster',
+                    'source': [f"{tile_url}/{timestep}/{{z}}/{{x}}/{{y}}.png"],
+                    'below': 'traces'
+                }]
+            fig.update_layout(map_layers=risk_layers(fig.frames[0].name))
+            for frame in fig.frames:
+                frame.layout = {'map': {'layers': risk_layers(frame.name)}}
+        
         fig.write_html(output_path)
         print(f"Simulation saved to {output_path}")
         return fig
@@ -0,0 +1,314 @@
+"""
+Risk Heatmap Tile Pyramid for SURAKSHA AI
+Renders per-timestep risk grids into content-addressed Web Mercator (XYZ) tiles
+and serves them over HTTP as /tiles/{timestep}/{z}/{x}/{y}.png, the layout
+Leaflet, MapLibre and Plotly map raster layers request
+"""
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.inundation import INDIA_BOUNDS
+
+# Same ramp as the Plotly map: green -> yellow -> orange -> red
+COLOR_STOPS = [(0.0, (0, 128, 0)), (0.4, (255, 255, 0)), (0.6, (255, 165, 0)), (1.0, (255, 0, 0))]
+
+
+def build_colormap(min_visible=0.05):
+    """256-entry RGBA lookup table; risk below min_visible is fully transparent"""
+    levels = np.linspace(0, 1, 256)
+    positions = [p for p, _ in COLOR_STOPS]
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.interp(levels, positions, [c[channel] for _, c in COLOR_STOPS])
+    lut[:, 3] = (80 + 175 * levels).astype(np.uint8)
+    # One canonical invisible colour, so blank and low-risk tiles hash identically
+    lut[levels < min_visible] = 0
+    return lut
+
+
+def encode_png(rgba):
+    """Minimal RGBA PNG encoder (no Pillow dependency)"""
+    height, width = rgba.shape[:2]
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)])
+
+    def chunk(tag, payload):
+        return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def encode_u8(values):
+    """Compact numeric tile: 'SRK1', height, width, then zlib-compressed uint8 risk"""
+    height, width = values.shape
+    return b'SRK1' + struct.pack('>HH', height, width) + zlib.compress(values.tobytes(), 6)
+
+
+def quantize(grid):
+    return np.round(np.clip(np.nan_to_num(grid), 0, 1) * 255).astype(np.uint8)
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """Fractional XYZ tile coordinates of a point (Web Mercator, y grows southwards)"""
+    n = 2 ** zoom
+    x = (np.asarray(lon) + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * n
+    return x, y
+
+
+def tile_range(bounds, zoom):
+    """(x_min, x_max, y_min, y_max) of the tiles at `zoom` that cover bounds"""
+    lat_min, lat_max, lon_min, lon_max = bounds
+    n = 2 ** zoom
+    x0, y0 = lonlat_to_tile(lon_min, lat_max, zoom)
+    x1, y1 = lonlat_to_tile(lon_max, lat_min, zoom)
+    clamp = lambda v: min(max(int(np.floor(v)), 0), n - 1)
+    return clamp(x0), clamp(x1), clamp(y0), clamp(y1)
+
+
+def _pixel_cells(edges, size):
+    """First grid cell under each pixel, the end cell, and which pixels overlap the grid.
+
+    `edges` are the tile_size + 1 pixel edges as fractional cell positions.
+    """
+    starts = np.clip(np.floor(edges[:-1]).astype(int), 0, size - 1)
+    end = min(max(int(np.ceil(edges[-1])), starts[-1] + 1), size)
+    inside = (edges[1:] > 0) & (edges[:-1] < size)
+    return starts, end, inside
+
+
+def tile_grid(grid, bounds, zoom, x, y, tile_size):
+    """Resample Web Mercator tile (x, y) at `zoom` from a lat/lon grid over bounds.
+
+    Grid cells are centred on an even lat/lon lattice with row 0 at lat_max,
+    as in InundationGrid. Each pixel takes the maximum of the cells it covers,
+    so zoomed-out tiles keep small hotspots; past the grid resolution it is
+    nearest-neighbour. Pixels outside the grid are 0.
+    """
+    lat_min, lat_max, lon_min, lon_max = bounds
+    rows, cols = grid.shape
+    n = 2 ** zoom
+    pixels = np.arange(tile_size + 1) / tile_size
+
+    # Longitude is linear in x; latitude follows the Mercator curve in y
+    lon = (x + pixels) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y + pixels) / n))))
+    r, r_end, r_inside = _pixel_cells((lat_max - lat) / (lat_max - lat_min) * (rows - 1) + 0.5, rows)
+    c, c_end, c_inside = _pixel_cells((lon - lon_min) / (lon_max - lon_min) * (cols - 1) + 0.5, cols)
+
+    block = grid[r[0]:r_end, c[0]:c_end]
+    # reduceat takes max over [start_i, start_i+1), or just cell start_i when starts repeat
+    block = np.maximum.reduceat(block, r - r[0], axis=0)
+    tile = np.maximum.reduceat(block, c - c[0], axis=1)
+    tile[~(r_inside[:, None] & c_inside[None, :])] = 0
+    return tile
+
+
+def _object_path(output_dir, digest, ext):
+    return os.path.join(output_dir, 'objects', digest[:2], f"{digest}.{ext}")
+
+
+def _render_timestep(args):
+    """Render every zoom level of one timestep; runs in a worker process"""
+    timestep, grid, bounds, min_zoom, max_zoom, tile_size, output_dir, tile_format, min_visible = args
+    values = quantize(grid)
+    lut = build_colormap(min_visible) if tile_format == 'png' else None
+    ext = tile_format
+
+    index = {}
+    written = set()
+    new_objects = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        x_min, x_max, y_min, y_max = tile_range(bounds, zoom)
+        for y in range(y_min, y_max + 1):
+            for x in range(x_min, x_max + 1):
+                tile = tile_grid(values, bounds, zoom, x, y, tile_size)
+                payload = encode_png(lut[tile]) if lut is not None else encode_u8(tile)
+                digest = hashlib.sha256(payload).hexdigest()[:32]
+                index[f"{timestep}/{zoom}/{x}/{y}"] = digest
+
+                if digest in written:
+                    continue
+                written.add(digest)
+                path = _object_path(output_dir, digest, ext)
+                if os.path.exists(path):
+                    continue
+                # Content-addressed, so concurrent writers of the same tile are harmless
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+                new_objects += 1
+    return index, new_objects
+
+
+class TilePyramidBuilder:
+    """Web Mercator XYZ tiles for the area covered by the grid.
+
+    Only tiles that overlap the grid bounds are written; others 404, which
+    map clients draw as empty.
+    """
+    def __init__(self, output_dir='visualization/tiles', min_zoom=0, max_zoom=6, tile_size=256,
+                 tile_format='png', min_visible=0.05, workers=None):
+        if tile_format not in ('png', 'u8'):
+            raise ValueError("tile_format must be 'png' or 'u8'")
+        self.output_dir = output_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.tile_size = tile_size
+        self.tile_format = tile_format
+        self.min_visible = min_visible
+        self.workers = workers
+
+    def build(self, frames, bounds=INDIA_BOUNDS):
+        """Render all timesteps in parallel and write manifest.json"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        jobs = [
+            (t, np.asarray(grid, dtype=np.float32), tuple(bounds), self.min_zoom, self.max_zoom,
+             self.tile_size, self.output_dir, self.tile_format, self.min_visible)
+            for t, grid in enumerate(frames)
+        ]
+
+        tiles = {}
+        new_objects = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for index, written in pool.map(_render_timestep, jobs):
+                tiles.update(index)
+                new_objects += written
+
+        manifest = {
+            'scheme': 'xyz',
+            'projection': 'EPSG:3857',
+            'format': self.tile_format,
+            'tile_size': self.tile_size,
+            'min_zoom': self.min_zoom,
+            'max_zoom': self.max_zoom,
+            'timesteps': len(jobs),
+            # (lat_min, lat_max, lon_min, lon_max) of the source grid
+            'bounds': list(bounds),
+            'tiles': tiles
+        }
+        # Replace atomically so a running TileStore never reads half a manifest
+        manifest_path = os.path.join(self.output_dir, 'manifest.json')
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        unique = len(set(tiles.values()))
+        print(f"  ✓ Rendered {len(tiles)} tiles ({unique} unique, {new_objects} new objects)")
+        return manifest
+
+
+class TileStore:
+    """Manifest lookup plus an LRU cache of tile bytes.
+
+    The manifest is re-read when a rebuild replaces it (checked at most every
+    `reload_interval` seconds); cached objects stay valid since they are
+    keyed by content hash.
+    """
+    def __init__(self, tile_dir='visualization/tiles', cache_size=4096, reload_interval=1.0):
+        self.tile_dir = tile_dir
+        self.manifest_path = os.path.join(tile_dir, 'manifest.json')
+        self.reload_interval = reload_interval
+        self.manifest = None
+        self._manifest_mtime = None
+        self._last_check = 0.0
+        self.read_object = lru_cache(maxsize=cache_size)(self._read_object)
+        self.reload()
+
+    def reload(self, force=True):
+        """Load the manifest if it changed since the last load; returns True if it did"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        mtime = os.stat(self.manifest_path).st_mtime_ns
+        if mtime == self._manifest_mtime:
+            return False
+        with open(self.manifest_path) as f:
+            self.manifest = json.load(f)
+        self._manifest_mtime = mtime
+        return True
+
+    def _read_object(self, digest, ext):
+        with open(_object_path(self.tile_dir, digest, ext), 'rb') as f:
+            return f.read()
+
+    @property
+    def format(self):
+        return self.manifest['format']
+
+    def get(self, timestep, zoom, x, y):
+        """Return (digest, bytes) or None if the tile does not exist"""
+        self.reload(force=False)
+        manifest = self.manifest
+        digest = manifest['tiles'].get(f"{timestep}/{zoom}/{x}/{y}")
+        if digest is None:
+            return None
+        return digest, self.read_object(digest, manifest['format'])
+
+    def metadata(self):
+        return {k: v for k, v in self.manifest.items() if k != 'tiles'}
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    store = None
+    route = re.compile(r'^/tiles/(\d+)/(\d+)/(\d+)/(\d+)\.(png|u8)$')
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/tiles/metadata.json':
+            return self._send(200, json.dumps(self.store.metadata()).encode())
+
+        match = self.route.match(self.path)
+        tile = None
+        if match and match.group(5) == self.store.format:
+            tile = self.store.get(*map(int, match.groups()[:4]))
+        if tile is None:
+            return self._send(404, b'{"success": false, "message": "Tile not found"}')
+
+        digest, body = tile
+        etag = f'"{digest}"'
+        # A rebuild can put new content behind the same URL: revalidate every time,
+        # which costs a 304 when the content hash is unchanged
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, headers=headers)
+        content_type = 'image/png' if match.group(5) == 'png' else 'application/octet-stream'
+        self._send(200, body, content_type, headers)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_tiles(tile_dir='visualization/tiles', port=8765, cache_size=4096):
+    """Serve /tiles/{t}/{z}/{x}/{y}.png; a map layer fetches only the visible tiles"""
+    handler = type('Handler', (TileRequestHandler,), {'store': TileStore(tile_dir, cache_size)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    print(f"🗺️ Serving tiles from {tile_dir} on http://127.0.0.1:{port}/tiles/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve_tiles()
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from src.alert_dispatch import AlertDispatcher, FakeGateway, SubscriberDirectory
+
+
+class FlakyGateway(FakeGateway):
+    """Raises a non-GatewayError exception for the first `failures` attempts at the batch holding subscriber 0"""
+    def __init__(self, channel, failures, error=OSError):
+        super().__init__(channel, latency=0.001, max_batch=10)
+        self.failures = failures
+        self.error = error
+
+    async def send_batch(self, message, recipients):
+        if recipients[0] == 0 and self.failures > 0:
+            self.failures -= 1
+            raise self.error("connection reset")
+        return await super().send_batch(message, recipients)
+
+
+def test_severe_preempts_low_under_binding_rate_limit():
+    async def scenario():
+        directory = SubscriberDirectory.synthetic(['LowCity'], 4000, channels=('sms',))
+        directory.add('SevereCity', 'sms', range(100))
+        dispatcher = AlertDispatcher(
+            [FakeGateway('sms', latency=0.001, max_batch=100)], directory,
+            rate_limits={'sms': 1000}, concurrency=16
+        )
+        dispatcher.start()
+        dispatcher.submit({'city': 'LowCity', 'risk_level': 'LOW', 'probability': 0.3})
+        # Let the LOW fan-out use up the burst so the limit binds
+        await asyncio.sleep(0.3)
+
+        submitted = time.perf_counter()
+        dispatcher.submit({'city': 'SevereCity', 'risk_level': 'SEVERE', 'probability': 0.95})
+        while 'SEVERE' not in dispatcher.completed:
+            await asyncio.sleep(0.01)
+        severe_latency = time.perf_counter() - submitted
+        await dispatcher.stop()
+        return severe_latency, dispatcher.stats
+
+    severe_latency, stats = asyncio.run(scenario())
+    # One 100-recipient batch at 1000 msg/s needs ~0.1s of tokens; 16 LOW batches queued
+    # ahead of it in the token line would take ~1.6s
+    assert severe_latency < 0.5
+    assert stats['delivered'] < 4000 + 100
+
+
+def test_unexpected_gateway_exceptions_are_retried_then_failed():
+    async def scenario(failures):
+        directory = SubscriberDirectory()
+        directory.add('Pune', 'sms', range(30))
+        gateway = FlakyGateway('sms', failures)
+        dispatcher = AlertDispatcher([gateway], directory, concurrency=2, max_retries=1)
+        dispatcher.start()
+        dispatcher.submit({'city': 'Pune', 'risk_level': 'HIGH', 'probability': 0.8})
+        await asyncio.wait_for(dispatcher.drain(), timeout=2)
+        return dispatcher
+
+    # One failure is absorbed by a retry
+    dispatcher = asyncio.run(scenario(1))
+    assert dispatcher.stats['delivered'] == 30
+    assert dispatcher.stats['retried'] == 1
+    assert 'HIGH' in dispatcher.completed
+
+    # Two failures on the same batch exhaust its retries; the job still completes
+    dispatcher = asyncio.run(scenario(2))
+    assert dispatcher.stats['delivered'] + dispatcher.stats['failed'] == 30
+    assert dispatcher.stats['failed'] == 10
+    assert 'HIGH' in dispatcher.completed
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from src.backtest import BacktestRunner
+
+
+def make_runner():
+    """One city, 20 days: floods on days 8-10 and day 12"""
+    num_days = 20
+    labels = np.zeros((num_days, 1), dtype=bool)
+    labels[8:11] = True
+    labels[12] = True
+    features = np.zeros((num_days, 1, 5), dtype=np.float32)
+    runner = BacktestRunner(features, labels, pd.date_range('2024-01-01', periods=num_days), ['Pune'])
+
+    scores = np.full((num_days, 1), 0.1, dtype=np.float32)
+    scores[0] = 0.7   # nothing follows within 3 days: false alarm
+    scores[5] = 0.9   # 3 days before the first episode
+    scores[9] = 0.9   # during the first episode
+    scores[11] = 0.6  # 1 day before the second episode
+    runner.scores = scores
+    return runner
+
+
+def test_sweep_counts_episodes_not_flood_days():
+    results = make_runner().sweep(thresholds=[0.5, 0.8], max_lead_steps=3).set_index('threshold')
+
+    low, high = results.loc[0.5], results.loc[0.8]
+    assert low['events'] == high['events'] == 2
+
+    # 0.5: day 5 warns episode 1 (72h), day 11 warns episode 2 (24h)
+    assert low['hits'] == 2
+    assert low['alarm_steps'] == 4
+    assert low['false_alarm_steps'] == 1
+    assert low['lead_time_median_h'] == 48
+    assert low['lead_time_p90_h'] <= 72
+
+    # 0.8: the day-9 alarm falls inside episode 1, so it does not count as warning episode 2
+    assert high['hits'] == 1
+    assert high['alarm_steps'] == 2
+    assert high['false_alarm_steps'] == 0
+    assert high['lead_time_median_h'] == 72
+
+
+def test_from_frame_infers_the_step_from_the_dates():
+    data = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=12, freq='6h'),
+        'city': 'Pune',
+        'flood_occurred': 0,
+        **{col: 0.0 for col in ['rainfall', 'river_level', 'rainfall_3day', 'rainfall_7day', 'river_rise']},
+    })
+    assert BacktestRunner.from_frame(data).step_hours == 6
+    assert BacktestRunner.from_frame(data, step_hours=24).step_hours == 24
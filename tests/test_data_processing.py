@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from src.data_processing import FloodDataProcessor
+
+FEATURE_COLS = ['rainfall', 'river_level', 'rainfall_3day', 'rainfall_7day', 'river_rise']
+
+
+def hourly_processor(days=10, flood_day='2024-01-09'):
+    """One city, hourly readings, one recorded flood day"""
+    times = pd.date_range('2024-01-01', periods=days * 24, freq='h')
+    rng = np.random.default_rng(0)
+    processor = FloodDataProcessor(freq='1h')
+    processor.rainfall = pd.DataFrame({'date': times, 'city': 'Pune', 'rainfall': rng.gamma(1.0, 1.0, len(times))})
+    processor.river_levels = pd.DataFrame({'date': times, 'city': 'Pune', 'river_level': 2 + rng.random(len(times))})
+    processor.flood_records = pd.DataFrame({'date': [flood_day], 'city': ['Pune'], 'flood_occurred': [1]})
+    processor.locations = pd.DataFrame({'city': ['Pune'], 'latitude': [18.52], 'longitude': [73.86]})
+    return processor
+
+
+def test_daily_flood_labels_cover_every_hourly_step():
+    processor = hourly_processor()
+    data = processor.prepare_training_data()
+
+    flood_day = data['date'].dt.floor('D') == pd.Timestamp('2024-01-09')
+    assert flood_day.sum() == 24
+    assert (data.loc[flood_day, 'flood_occurred'] == 1).all()
+    assert (data.loc[~flood_day, 'flood_occurred'] == 0).all()
+
+    sequences, targets = processor.create_sequences(data, FEATURE_COLS, timesteps=6)
+    assert sequences.shape[1:] == (6, len(FEATURE_COLS))
+    # Every hour of the flood day is a positive target once its 7-day window is complete
+    assert targets.sum() == 24
+
+
+def test_rolling_rainfall_is_nan_until_its_window_is_fully_observed():
+    days = pd.date_range('2024-01-01', periods=20, freq='D')
+    observed = [d for i, d in enumerate(days) if not 8 <= i <= 11]
+    processor = FloodDataProcessor()
+    processor.rainfall = pd.DataFrame({'date': observed, 'city': 'Pune', 'rainfall': 10.0})
+    processor.river_levels = pd.DataFrame({'date': days, 'city': 'Pune', 'river_level': 3.0})
+    processor.flood_records = pd.DataFrame({'date': [], 'city': [], 'flood_occurred': []})
+    processor.locations = pd.DataFrame({'city': ['Pune'], 'latitude': [18.52], 'longitude': [73.86]})
+    data = processor.prepare_training_data().set_index('date')
+
+    # Complete windows sum all of their days
+    assert data.loc['2024-01-07', 'rainfall_7day'] == 70
+    assert data.loc['2024-01-08', 'rainfall_3day'] == 30
+    # The first rows after the 4-day gap are not gap rows, but their windows are incomplete
+    after_gap = data.loc['2024-01-13']
+    assert not after_gap['is_gap']
+    assert np.isnan(after_gap['rainfall_7day'])
+    assert data.loc['2024-01-15', 'rainfall_3day'] == 30
+    assert np.isnan(data.loc['2024-01-18', 'rainfall_7day'])
+    assert data.loc['2024-01-19', 'rainfall_7day'] == 70
+
+    X, y = processor.training_matrix(data.reset_index(), FEATURE_COLS)
+    assert not X.isna().any().any()
+    assert len(X) == 20 - 6 - 4 - 6
@@ -0,0 +1,59 @@
+import asyncio
+
+import pandas as pd
+
+from src.ingestion import CityFeatureState, FileTailSource
+
+
+def test_rainfall_windows_follow_reading_time_not_reading_count():
+    state = CityFeatureState()
+    days = pd.date_range('2024-01-01', periods=10, freq='D')
+    rows = {}
+    for day in days:
+        if day == pd.Timestamp('2024-01-06'):
+            continue  # dropped reading
+        rows[day] = state.update(day, 10.0, 3.0)
+
+    # A duplicate reading is dropped instead of counting twice
+    assert state.update(days[-1], 10.0, 3.0) is None
+
+    # Windows span calendar days, so the missing day leaves a hole rather than stretching them
+    rainfall_3day, rainfall_7day = rows[days[6]][2], rows[days[6]][3]
+    assert rainfall_3day == 20
+    assert rainfall_7day == 60
+    assert rows[days[9]][3] == 60
+
+    # At a 15-minute cadence the 3-day window still covers three days
+    fast = CityFeatureState(freq='15min')
+    times = pd.date_range('2024-01-01', periods=4 * 24 * 5, freq='15min')
+    for t in times:
+        row = fast.update(t, 1.0, 3.0)
+    assert row[2] == 4 * 24 * 3
+
+
+def test_river_rise_is_per_step_over_the_elapsed_time():
+    state = CityFeatureState()
+    state.update(pd.Timestamp('2024-01-01'), 0.0, 3.0)
+    row = state.update(pd.Timestamp('2024-01-03'), 0.0, 4.0)
+    assert row[4] == 0.5
+
+
+def test_tail_waits_for_the_rest_of_a_partly_written_line(tmp_path):
+    path = tmp_path / 'readings.csv'
+    path.write_text('2024-01-01,Pune,12.5,3')
+
+    async def collect():
+        source = FileTailSource(str(path), follow=True, poll_interval=0.01)
+        readings = source.readings()
+        task = asyncio.ensure_future(readings.__anext__())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('.25\n')
+        reading = await asyncio.wait_for(task, 1.0)
+        await readings.aclose()
+        return reading
+
+    reading = asyncio.run(collect())
+    assert reading['river_level'] == 3.25
+    assert reading['time'] == pd.Timestamp('2024-01-01')
@@ -0,0 +1,22 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model_registry import FlatForest, ModelRegistry
+from src.risk_engine import RiskAnalyticsEngine
+
+
+def test_engine_started_on_empty_registry_picks_up_first_publish(tmp_path):
+    root = str(tmp_path / 'registry')
+    engine = RiskAnalyticsEngine(rf_model_path=str(tmp_path / 'missing.pkl'),
+                                 lstm_model_path=str(tmp_path / 'missing.h5'),
+                                 registry_path=root, poll_interval=0.0)
+    assert engine.model_handle is not None
+    assert engine.current_rf_model() is None
+
+    rng = np.random.default_rng(0)
+    X = rng.random((60, 5))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, X[:, 0] > 0.5)
+    ModelRegistry(root).publish(model)
+
+    assert isinstance(engine.current_rf_model(), FlatForest)
+    assert 0.0 <= engine.predict_risk(X[0]) <= 1.0
@@ -0,0 +1,45 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from src.inundation import INDIA_BOUNDS
+from src.tiles import TilePyramidBuilder, lonlat_to_tile
+
+
+def read_u8(path):
+    with open(path, 'rb') as f:
+        payload = f.read()
+    assert payload[:4] == b'SRK1'
+    height, width = struct.unpack('>HH', payload[4:8])
+    return np.frombuffer(zlib.decompress(payload[8:]), dtype=np.uint8).reshape(height, width)
+
+
+def test_hotspot_lands_on_its_web_mercator_pixel(tmp_path):
+    lat_min, lat_max, lon_min, lon_max = INDIA_BOUNDS
+    rows, cols = 311, 301
+    grid = np.zeros((rows, cols), dtype=np.float32)
+    lat, lon = 19.0760, 72.8777  # Mumbai
+    grid[round((lat_max - lat) / (lat_max - lat_min) * (rows - 1)),
+         round((lon - lon_min) / (lon_max - lon_min) * (cols - 1))] = 1.0
+
+    manifest = TilePyramidBuilder(str(tmp_path), max_zoom=5, tile_size=64, tile_format='u8',
+                                  workers=1).build([grid])
+    assert manifest['scheme'] == 'xyz'
+
+    for zoom in range(6):
+        fx, fy = lonlat_to_tile(lon, lat, zoom)
+        x, y = int(fx), int(fy)
+        digest = manifest['tiles'][f"0/{zoom}/{x}/{y}"]
+        tile = read_u8(tmp_path / 'objects' / digest[:2] / f"{digest}.u8")
+        hot_y, hot_x = np.unravel_index(tile.argmax(), tile.shape)
+        assert tile.max() == 255
+        # Within a pixel (plus one cell at the highest zoom) of the projected point
+        assert abs(hot_x - (fx - x) * 64) <= 2
+        assert abs(hot_y - (fy - y) * 64) <= 2
+
+    # Only tiles over the grid are rendered
+    assert '0/5/0/0' not in manifest['tiles']
+    with open(tmp_path / 'manifest.json') as f:
+        assert json.load(f)['bounds'] == list(INDIA_BOUNDS)
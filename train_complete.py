@@ -38,8 +38,7 @@ def train_models():
     
     # Prepare features
     feature_cols = ['rainfall', 'river_level', 'rainfall_3day', 'rainfall_7day', 'river_rise']
-    X = data[feature_cols].fillna(0)
-    y = data['flood_occurred']
+    X, y = processor.training_matrix(data, feature_cols)
     
     print(f"\n🎯 Training data prepared:")
     print(f"  • Features: {len(feature_cols)}")